@@ -11,11 +11,30 @@ from livekit.agents import AgentServer, AgentSession, Agent, room_io, JobContext
 from livekit.plugins import openai as openai_plugin
 from livekit import rtc
 import asyncio
+import httpx
 import yaml
 import logging
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 logger = logging.getLogger("voice-agent")
 logging.basicConfig(level=logging.INFO)
+# httpx logs every request at INFO; keep the per-session health probe quiet
+logging.getLogger("httpx").setLevel(logging.WARNING)
+# Skip per-record caller-frame, thread and process lookups; none of them are
+# part of the log format.
+logging._srcfile = None
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# Use the faster libuv-based event loop where available. Set at import so the
+# job processes spawned by the agent server pick it up too.
+if uvloop is not None:
+    uvloop.install()
 
 # Models that require the Google plugin instead of OpenAI
 _GOOGLE_MODEL_PREFIXES = ("gemini-",)
@@ -33,6 +52,11 @@ def _load_config() -> dict:
         return yaml.safe_load(f)
 
 
+def _check_health(url: str) -> None:
+    """Raise if the given health URL does not answer. Blocking -- run in a thread."""
+    httpx.get(url, timeout=3).raise_for_status()
+
+
 def _build_llm(config: dict):
     """Return an LLM plugin instance based on the model name in config.
 
@@ -51,7 +75,7 @@ def _build_llm(config: dict):
     return openai_plugin.LLM(model=model)
 
 
-def _build_tts(config: dict):
+async def _build_tts(config: dict):
     """Return a TTS plugin instance based on the selected voice entry.
 
     The active voice is read from config['tts']['voice']. Each voice entry
@@ -95,13 +119,12 @@ def _build_tts(config: dict):
         )
     elif engine == "kokoro":
         base_url = engine_cfg.get("base_url", "http://localhost:8880/v1")
-        # Verify the Kokoro server is reachable before creating the TTS instance
-        import urllib.request
-        import urllib.error
+        # Verify the Kokoro server is reachable before creating the TTS instance.
+        # The probe blocks, so keep it off the event loop.
         try:
             health_url = base_url.rstrip("/").rsplit("/v1", 1)[0] + "/v1/models"
-            urllib.request.urlopen(health_url, timeout=3)
-        except (urllib.error.URLError, OSError) as exc:
+            await asyncio.to_thread(_check_health, health_url)
+        except (httpx.HTTPError, OSError) as exc:
             logger.warning(
                 "Kokoro TTS server not reachable at %s (%s) — running in text-only mode",
                 base_url, exc,
@@ -127,6 +150,27 @@ def _build_tts(config: dict):
             f"Supported engines: cartesia, kokoro, piper"
         )
 
+
+def _preload_plugins(config: dict) -> None:
+    """Import the plugin modules the current config uses at process start.
+
+    This moves the (slow) first import off the first session's startup path.
+    Modules for models/voices picked later in the UI are still imported lazily.
+    """
+    if config["llm"]["model"].startswith(_GOOGLE_MODEL_PREFIXES):
+        from livekit.plugins import google  # noqa: F401
+
+    voice_id = config["tts"].get("voice", "kokoro_af_heart")
+    entry = next((v for v in config["tts"].get("voices", []) if v["id"] == voice_id), {})
+    engine = entry.get("engine")
+    if engine == "cartesia":
+        from livekit.plugins import cartesia  # noqa: F401
+    elif engine == "piper":
+        from livekit.plugins import piper_tts  # noqa: F401
+
+
+_preload_plugins(_load_config())
+
 server = AgentServer()
 
 
@@ -137,7 +181,18 @@ async def entrypoint(ctx: JobContext):
     # Re-read config from disk so model changes from the UI take effect
     config = _load_config()
 
-    tts = _build_tts(config)
+    # session.start() automatically connects the room. We must connect
+    # explicitly first only because the RPC registrations below need
+    # ctx.room.local_participant to exist already. Do it while the TTS
+    # server is being probed rather than after.
+    connect = asyncio.create_task(ctx.connect())
+    try:
+        tts = await _build_tts(config)
+    except BaseException:
+        # Bad voice/engine config: fail the job without joining the room
+        connect.cancel()
+        raise
+    await connect
 
     agent = Agent(instructions=config["app"]["default_system_prompt"])
 
@@ -147,11 +202,6 @@ async def entrypoint(ctx: JobContext):
         # No stt= or vad= needed -- browser handles STT via Web Speech API
     )
 
-    # session.start() automatically connects the room. We must connect
-    # explicitly first only because the RPC registrations below need
-    # ctx.room.local_participant to exist already.
-    await ctx.connect()
-
     # RPC: frontend can update the system prompt at runtime
     @ctx.room.local_participant.register_rpc_method("update_system_prompt")
     async def on_update_prompt(data: rtc.RpcInvocationData) -> str:
@@ -164,7 +214,7 @@ async def entrypoint(ctx: JobContext):
     async def on_interrupt(data: rtc.RpcInvocationData) -> str:
         try:
             await session.interrupt()
-            logger.info("Agent interrupted via RPC")
+            logger.debug("Agent interrupted via RPC")
         except RuntimeError:
             logger.debug("Interrupt called but no active generation to stop")
         return "ok"
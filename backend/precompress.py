@@ -0,0 +1,31 @@
+"""Precompress frontend text assets for the token server.
+
+Writes .gz and .br siblings next to every .html/.js/.css file in frontend/.
+The token server serves these instead of the originals when the browser
+accepts the encoding. Run again after editing anything in frontend/ (the
+server ignores compressed files older than their source).
+
+Usage: python precompress.py
+"""
+
+from pathlib import Path
+import brotli
+import gzip
+
+_FRONTEND_DIR = Path(__file__).parent.parent / "frontend"
+_SUFFIXES = {".html", ".js", ".css"}
+
+
+def main() -> None:
+    for path in sorted(_FRONTEND_DIR.rglob("*")):
+        if path.suffix not in _SUFFIXES or not path.is_file():
+            continue
+        data = path.read_bytes()
+        # mtime=0 keeps the gzip output reproducible
+        Path(f"{path}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        Path(f"{path}.br").write_bytes(brotli.compress(data, quality=11))
+        print(f"compressed {path.relative_to(_FRONTEND_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
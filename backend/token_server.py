@@ -9,166 +9,462 @@ Endpoints:
   GET  /                           -- serves frontend static files
 """
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
 from livekit.api import AccessToken, VideoGrants, RoomAgentDispatch, RoomConfiguration
-from pydantic import BaseModel
+import asyncio
+import base64
+import contextlib
+import hmac
+import httpx
+import msgspec
+import orjson
 import os
+import socket
+import time
 import yaml
-import urllib.request
-import urllib.error
+from urllib.parse import urlsplit, urlunsplit
+
+# Prefer the libyaml C bindings when available (same output, much faster)
+try:
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
 
 # Load environment variables from project root .env.local
 load_dotenv(Path(__file__).parent.parent / ".env.local")
 
+# LiveKit credentials are fixed for the life of the process
+try:
+    _LK_KEY = os.environ["LIVEKIT_API_KEY"]
+    _LK_SECRET = os.environ["LIVEKIT_API_SECRET"]
+    _LK_URL = os.environ["LIVEKIT_URL"]
+except KeyError as exc:
+    raise RuntimeError(f"{exc.args[0]} is not set (see .env.local)") from exc
+_LK_SECRET_BYTES = _LK_SECRET.encode()
+
 # Load non-sensitive config
 _CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
 
-with open(_CONFIG_PATH) as f:
-    config = yaml.safe_load(f)
+# Parsed config, keyed by the file's mtime so out-of-band edits are picked up.
+# The allowed model/voice ids and token claims are derived from it once per
+# reload; the /api/config body and its ETag are refreshed on every change.
+_CACHE = {
+    "mtime": 0,
+    "etag": None,
+    "body": b"",
+    "data": None,
+    "model_ids": frozenset(),
+    "voice_ids": frozenset(),
+    "claims": None,
+}
+
+# Explicitly dispatch the agent when a participant connects.
+# This ensures the agent is dispatched even if auto-dispatch doesn't fire.
+_ROOM_CFG = RoomConfiguration(
+    agents=[
+        RoomAgentDispatch(agent_name=""),
+    ],
+)
 
-app = FastAPI(title="LiveKit Voice App Token Server")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
 
 
-@app.get("/api/token")
-async def get_token(identity: str = Query(..., description="Participant identity")):
-    """Generate a LiveKit JWT access token for the given identity."""
+_JWT_HEADER = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+
+
+def _sign(header_b64: bytes, payload_b64: bytes) -> str:
+    """Return a compact HS256 JWT using the one-shot (OpenSSL) HMAC path."""
+    signing_input = header_b64 + b"." + payload_b64
+    sig = hmac.digest(_LK_SECRET_BYTES, signing_input, "sha256")
+    return (signing_input + b"." + _b64url(sig)).decode()
+
+
+def _claims_template(room_name: str) -> tuple:
+    """Return (claims, nbf_offset, exp_offset) shared by every access token.
+
+    The claims are taken from a token minted by livekit-api itself, so their
+    layout always matches the installed library. Only the identity and the
+    validity window vary per request.
+    """
     token = AccessToken(
-        api_key=os.getenv("LIVEKIT_API_KEY"),
-        api_secret=os.getenv("LIVEKIT_API_SECRET"),
+        api_key=_LK_KEY,
+        api_secret=_LK_SECRET,
     )
-    token.identity = identity
+    token.identity = "template"
     token.with_kind("standard")
     token.with_grants(VideoGrants(
         room_join=True,
-        room=config["app"]["room_name"],
+        room=room_name,
         can_publish=True,
         can_subscribe=True,
     ))
-    # Explicitly dispatch the agent when this participant connects.
-    # This ensures the agent is dispatched even if auto-dispatch doesn't fire.
-    token.with_room_config(
-        RoomConfiguration(
-            agents=[
-                RoomAgentDispatch(agent_name=""),
-            ],
-        ),
-    )
-    return {"token": token.to_jwt(), "url": os.getenv("LIVEKIT_URL")}
+    token.with_room_config(_ROOM_CFG)
+    payload = token.to_jwt().split(".")[1]
+    claims = orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    for name in ("sub", "nbf", "exp"):
+        del claims[name]
+    # livekit-api sets nbf to the mint time and exp to nbf + ttl. Derive the
+    # offsets from ttl; timing to_jwt() against the clock can be off by 1s.
+    return claims, 0, int(token.ttl.total_seconds())
+
+
+def _public_config(cfg: dict) -> dict:
+    """Return the non-sensitive subset of the config served to the frontend."""
+    return {
+        "default_system_prompt": cfg["app"]["default_system_prompt"],
+        "room_name": cfg["app"]["room_name"],
+        "active_model": cfg["llm"]["model"],
+        "models": cfg["llm"].get("models", []),
+        "active_voice": cfg["tts"].get("voice", "kokoro_af_heart"),
+        "voices": cfg["tts"].get("voices", []),
+    }
+
+
+def _stamp(cfg: dict, mtime: int) -> None:
+    """Record cfg as matching config.yaml at mtime and re-serialize /api/config."""
+    _CACHE["mtime"] = mtime
+    _CACHE["body"] = orjson.dumps(_public_config(cfg))
+    _CACHE["etag"] = f'W/"{mtime:x}"'
+
+
+def _get_config() -> dict:
+    """Return the parsed config, re-reading config.yaml only if it changed."""
+    mtime = os.stat(_CONFIG_PATH).st_mtime_ns
+    if _CACHE["data"] is None or mtime != _CACHE["mtime"]:
+        with open(_CONFIG_PATH) as f:
+            cfg = yaml.load(f, Loader=_YamlLoader)
+        _CACHE["data"] = cfg
+        _CACHE["model_ids"] = frozenset(m["id"] for m in cfg["llm"].get("models", []))
+        _CACHE["voice_ids"] = frozenset(v["id"] for v in cfg["tts"].get("voices", []))
+        _CACHE["claims"] = _claims_template(cfg["app"]["room_name"])
+        _stamp(cfg, mtime)
+    return _CACHE["data"]
+
+
+def _save_config(cfg: dict) -> int:
+    """Write the config to disk and return the file's new mtime_ns.
+
+    Writes to a temp file and renames it over config.yaml, so the agent never
+    reads a half-written file. Blocking -- use _update_config() from handlers.
+    """
+    tmp = f"{_CONFIG_PATH}.tmp.{os.getpid()}"
+    try:
+        with open(tmp, "w") as f:
+            yaml.dump(cfg, f, Dumper=_YamlDumper, default_flow_style=False, sort_keys=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, _CONFIG_PATH)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    return os.stat(_CONFIG_PATH).st_mtime_ns
+
+
+# Serializes read-modify-write config updates. Created lazily so that it binds
+# to the server's event loop (asyncio.Lock grabs a loop at creation on 3.9).
+_UPDATE_LOCK = None
+
+
+async def _update_config(section: str, key: str, value) -> None:
+    """Set config[section][key] = value and persist it without blocking the loop.
+
+    The change is written from a copy; the cached config is only replaced once
+    the file is on disk, so a failed write leaves cache and file in agreement.
+    """
+    global _UPDATE_LOCK
+    if _UPDATE_LOCK is None:
+        _UPDATE_LOCK = asyncio.Lock()
+    async with _UPDATE_LOCK:
+        current = _get_config()
+        cfg = {**current, section: {**current[section], key: value}}
+        mtime = await asyncio.to_thread(_save_config, cfg)
+        _CACHE["data"] = cfg
+        _stamp(cfg, mtime)
+
+
+# Shared client for local TTS health checks -- keeps connections alive
+# between status polls instead of opening a fresh socket each time.
+_HTTP = httpx.AsyncClient(timeout=1.0, limits=httpx.Limits(max_keepalive_connections=4))
+
+
+def _json(payload) -> Response:
+    """Return payload as a JSON response encoded with orjson."""
+    return Response(orjson.dumps(payload), media_type="application/json")
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    await _HTTP.aclose()
+
+
+app = FastAPI(
+    title="LiveKit Voice App Token Server",
+    lifespan=_lifespan,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@app.get("/api/token")
+async def get_token(identity: str = Query(..., min_length=1, description="Participant identity")):
+    """Generate a LiveKit JWT access token for the given identity."""
+    _get_config()  # refreshes the cached claims if config.yaml changed
+    claims, nbf_offset, exp_offset = _CACHE["claims"]
+    now = int(time.time())
+    payload = orjson.dumps({
+        **claims,
+        "sub": identity,
+        "nbf": now + nbf_offset,
+        "exp": now + exp_offset,
+    })
+    return _json({"token": _sign(_JWT_HEADER, _b64url(payload)), "url": _LK_URL})
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weakly compare etag against an If-None-Match value (a tag list or '*')."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
 
 
 @app.get("/api/config")
-async def get_config():
-    """Return non-sensitive app configuration to the frontend."""
+async def get_config(request: Request):
+    """Return non-sensitive app configuration to the frontend.
+
+    The JSON body is serialized once per config change and tagged with a weak
+    ETag derived from config.yaml's mtime, so clients revalidating an
+    unchanged config get an empty 304.
+    """
+    _get_config()
+    etag = _CACHE["etag"]
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(_CACHE["body"], media_type="application/json", headers=headers)
+
+
+async def _decode_body(request: Request, body_type):
+    """Decode and validate a JSON request body into a msgspec Struct."""
+    # Only accept JSON media types, as FastAPI's own body parsing does. A
+    # text/plain POST needs no CORS preflight, so it must not reach the decoder.
+    media_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if media_type != "application/json" and not (
+        media_type.startswith("application/") and media_type.endswith("+json")
+    ):
+        raise HTTPException(status_code=415, detail="Content-Type must be application/json")
+    try:
+        return msgspec.json.decode(await request.body(), type=body_type)
+    except msgspec.ValidationError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except msgspec.DecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {exc}")
+
+
+def _json_body(body_type) -> dict:
+    """Return openapi_extra declaring body_type as the JSON request body.
+
+    Handlers decoding with _decode_body() take a raw Request, so FastAPI can't
+    infer the body schema itself.
+    """
+    _, components = msgspec.json.schema_components([body_type])
     return {
-        "default_system_prompt": config["app"]["default_system_prompt"],
-        "room_name": config["app"]["room_name"],
-        "active_model": config["llm"]["model"],
-        "models": config["llm"].get("models", []),
-        "active_voice": config["tts"].get("voice", "kokoro_af_heart"),
-        "voices": config["tts"].get("voices", []),
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": components[body_type.__name__]}},
+        },
     }
 
 
-class ModelUpdate(BaseModel):
+class ModelUpdate(msgspec.Struct):
     model: str
 
 
-@app.post("/api/config/model")
-async def set_model(body: ModelUpdate):
+@app.post("/api/config/model", openapi_extra=_json_body(ModelUpdate))
+async def set_model(request: Request):
     """Update the active LLM model.
 
     Validates against the models list in config, updates the in-memory config,
     and persists the change to config.yaml so the agent picks it up on the
-    next session.
+    next session. Expects a JSON body of the form {"model": "<id>"}.
     """
-    allowed_ids = {m["id"] for m in config["llm"].get("models", [])}
+    body = await _decode_body(request, ModelUpdate)
+    _get_config()  # refreshes the allowed ids if config.yaml changed
+    allowed_ids = _CACHE["model_ids"]
     if body.model not in allowed_ids:
-        from fastapi import HTTPException
         raise HTTPException(
             status_code=400,
             detail=f"Unknown model '{body.model}'. Allowed: {sorted(allowed_ids)}",
         )
 
-    config["llm"]["model"] = body.model
-
     # Persist to disk so the agent reads the new model on next session
-    with open(_CONFIG_PATH, "w") as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+    await _update_config("llm", "model", body.model)
 
-    return {"active_model": body.model}
+    return _json({"active_model": body.model})
 
 
-class VoiceUpdate(BaseModel):
+class VoiceUpdate(msgspec.Struct):
     voice: str
 
 
-@app.post("/api/config/voice")
-async def set_voice(body: VoiceUpdate):
+@app.post("/api/config/voice", openapi_extra=_json_body(VoiceUpdate))
+async def set_voice(request: Request):
     """Update the active TTS voice.
 
     Validates against the voices list in config, updates the in-memory config,
     and persists the change to config.yaml so the agent picks it up on the
-    next session.
+    next session. Expects a JSON body of the form {"voice": "<id>"}.
     """
-    allowed_ids = {v["id"] for v in config["tts"].get("voices", [])}
+    body = await _decode_body(request, VoiceUpdate)
+    _get_config()  # refreshes the allowed ids if config.yaml changed
+    allowed_ids = _CACHE["voice_ids"]
     if body.voice not in allowed_ids:
-        from fastapi import HTTPException
         raise HTTPException(
             status_code=400,
             detail=f"Unknown voice '{body.voice}'. Allowed: {sorted(allowed_ids)}",
         )
 
-    config["tts"]["voice"] = body.voice
-
     # Persist to disk so the agent reads the new voice on next session
-    with open(_CONFIG_PATH, "w") as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+    await _update_config("tts", "voice", body.voice)
 
-    return {"active_voice": body.voice}
+    return _json({"active_voice": body.voice})
 
 
 # Engines that run locally and need a health check
 _LOCAL_ENGINES = {"kokoro", "piper"}
 
+# Health doesn't change on sub-second timescales, so recent probe results are
+# reused and concurrent pollers share a single in-flight probe.
+_STATUS_TTL = 3.0
+_STATUS_CACHE: dict[tuple, tuple[float, str]] = {}
+_INFLIGHT: dict[tuple, asyncio.Task] = {}
+
+# Health URL -> the same URL pointed at the address that last answered
+_RESOLVED: dict[str, str] = {}
+
+
+def _ip_urls(parts, infos) -> list:
+    """Return the URL in parts re-pointed at each distinct address in infos, in order."""
+    urls = []
+    for ip in dict.fromkeys(info[4][0] for info in infos):
+        if "%" in ip:  # scoped IPv6 addresses don't fit in a URL host
+            continue
+        host = f"[{ip}]" if ":" in ip else ip
+        netloc = f"{host}:{parts.port}" if parts.port else host
+        urls.append(urlunsplit(parts._replace(netloc=netloc)))
+    return urls
+
+
+async def _get_health(health_url: str) -> httpx.Response:
+    """GET the health URL through a literal IP, sending the original Host header.
+
+    Health URLs almost always point at localhost, so the address that answered
+    last is remembered and tried first, skipping getaddrinfo (and any DNS
+    stall) on later probes. Otherwise every resolved address is tried in order,
+    as urlopen does -- localhost often resolves to ::1 first while local TTS
+    servers listen on IPv4 only. Non-http URLs are left alone so TLS
+    certificate checks still see the real hostname.
+    """
+    parts = urlsplit(health_url)
+    if parts.scheme != "http":
+        return await _HTTP.get(health_url)
+    headers = {"Host": parts.netloc}
+
+    cached = _RESOLVED.get(health_url)
+    if cached is not None:
+        try:
+            return await _HTTP.get(cached, headers=headers)
+        except httpx.TransportError:
+            _RESOLVED.pop(health_url, None)
+
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        parts.hostname, parts.port or 80, type=socket.SOCK_STREAM,
+    )
+    error = None
+    for url in _ip_urls(parts, infos):
+        try:
+            r = await _HTTP.get(url, headers=headers)
+        except httpx.TransportError as exc:
+            error = exc
+            continue
+        _RESOLVED[health_url] = url
+        return r
+    raise error or OSError(f"No usable address for {parts.hostname}")
+
+
+async def _probe(key: tuple) -> str:
+    """Hit the health URL for (engine, health_url) and cache the result."""
+    _, health_url = key
+    try:
+        r = await _get_health(health_url)
+        status = "online" if r.is_success else "offline"
+    except (httpx.HTTPError, OSError):
+        status = "offline"
+    finally:
+        _INFLIGHT.pop(key, None)
+    _STATUS_CACHE[key] = (time.monotonic(), status)
+    return status
+
+
+async def _health_status(engine: str, health_url: str) -> str:
+    """Return 'online' or 'offline', probing at most once per TTL window."""
+    key = (engine, health_url)
+    hit = _STATUS_CACHE.get(key)
+    if hit is not None and time.monotonic() - hit[0] < _STATUS_TTL:
+        return hit[1]
+
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = _INFLIGHT[key] = asyncio.ensure_future(_probe(key))
+    # Shield so one client disconnecting doesn't cancel the probe for the others
+    return await asyncio.shield(task)
+
 
 @app.get("/api/tts/status")
 async def tts_status():
     """Return the active TTS engine type and its health status.
 
     For local engines (kokoro, piper) this performs a quick HTTP health check
-    against the configured server URL. Cloud engines and text_only always
-    return status 'ok'.
+    against the configured server URL (cached for a few seconds). Cloud
+    engines and text_only always return status 'ok'.
     """
-    voice_id = config["tts"].get("voice", "kokoro_af_heart")
+    cfg = _get_config()
+    voice_id = cfg["tts"].get("voice", "kokoro_af_heart")
 
     # Text-only mode
     if voice_id == "text_only":
-        return {"engine": "text_only", "status": "ok", "label": "Text Only"}
+        return _json({"engine": "text_only", "status": "ok", "label": "Text Only"})
 
     # Resolve voice entry
-    voices = config["tts"].get("voices", [])
+    voices = cfg["tts"].get("voices", [])
     entry = next((v for v in voices if v["id"] == voice_id), None)
     if entry is None:
-        return {"engine": "unknown", "status": "error", "label": "Unknown voice"}
+        return _json({"engine": "unknown", "status": "error", "label": "Unknown voice"})
 
     engine = entry.get("engine", "unknown")
-    engine_cfg = config["tts"].get(engine, {})
+    engine_cfg = cfg["tts"].get(engine, {})
 
     # Cloud engine -- no health check needed
     if engine not in _LOCAL_ENGINES:
         label = engine.capitalize()
-        return {"engine": engine, "status": "ok", "label": f"Cloud ({label})"}
+        return _json({"engine": engine, "status": "ok", "label": f"Cloud ({label})"})
 
     # Local engine -- perform health check
     label = engine.capitalize()
@@ -182,19 +478,100 @@ async def tts_status():
         health_url = None
 
     if health_url:
-        try:
-            urllib.request.urlopen(health_url, timeout=3)
-            return {"engine": engine, "status": "online", "label": label}
-        except (urllib.error.URLError, OSError):
-            return {"engine": engine, "status": "offline", "label": label}
+        status = await _health_status(engine, health_url)
+        return _json({"engine": engine, "status": status, "label": label})
+
+    return _json({"engine": engine, "status": "unknown", "label": label})
+
+
+def _encoding_prefs(accept_encoding: str) -> dict:
+    """Parse an Accept-Encoding header into {coding: q-value}."""
+    prefs = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        prefs[coding.lower()] = q
+    return prefs
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves precompressed .br/.gz siblings when accepted.
+
+    The compressed files are produced by precompress.py. A sibling older than
+    its source is treated as stale and ignored. Each content-coding gets its
+    own ETag, since it is a different byte sequence from the source file.
+    """
 
-    return {"engine": engine, "status": "unknown", "label": label}
+    _ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code != 200 or not isinstance(response, FileResponse):
+            return response
+
+        response.headers["Vary"] = "Accept-Encoding"
+        request_headers = Headers(scope=scope)
+        prefs = _encoding_prefs(request_headers.get("accept-encoding", ""))
+        # Codings the client accepts (q > 0), most preferred first; ties keep
+        # our own order (br before gzip).
+        candidates = sorted(
+            (
+                (encoding, suffix)
+                for encoding, suffix in self._ENCODINGS
+                if prefs.get(encoding, prefs.get("*", 0.0)) > 0
+            ),
+            key=lambda c: -prefs.get(c[0], prefs.get("*", 0.0)),
+        )
+        if not candidates:
+            return response
+
+        found = await asyncio.to_thread(self._find_compressed, response, candidates)
+        if found is None:
+            return response
+
+        encoding, compressed_path, stat = found
+        compressed = FileResponse(
+            compressed_path,
+            stat_result=stat,
+            media_type=response.media_type,
+            headers={
+                "Content-Encoding": encoding,
+                "Vary": "Accept-Encoding",
+                "etag": response.headers["etag"].rstrip('"') + f'-{encoding}"',
+                "last-modified": response.headers["last-modified"],
+            },
+        )
+        if self.is_not_modified(compressed.headers, request_headers):
+            return NotModifiedResponse(compressed.headers)
+        return compressed
+
+    @staticmethod
+    def _find_compressed(response: FileResponse, candidates: list):
+        """Return (encoding, path, stat) of the first fresh sibling, or None. Blocking."""
+        source = response.stat_result or os.stat(response.path)
+        for encoding, suffix in candidates:
+            try:
+                stat = os.stat(response.path + suffix)
+            except OSError:
+                continue
+            if stat.st_mtime >= source.st_mtime:
+                return encoding, response.path + suffix, stat
+        return None
 
 
 # Serve frontend static files (must be last -- catches all unmatched routes)
 app.mount(
     "/",
-    StaticFiles(
+    PrecompressedStaticFiles(
         directory=Path(__file__).parent.parent / "frontend",
         html=True,
     ),
@@ -125,6 +125,7 @@ start_token_server() {
     log_info "Starting token server on port $TOKEN_PORT ..."
     cd "$BACKEND_DIR"
     source "$VENV_DIR/bin/activate"
+    python precompress.py > "$LOG_DIR/precompress.log" 2>&1 || log_warn "Precompressing frontend assets failed (serving uncompressed)"
     uvicorn token_server:app --port "$TOKEN_PORT" > "$LOG_DIR/token_server.log" 2>&1 &
     local new_pid=$!
     write_pid token_server "$new_pid"